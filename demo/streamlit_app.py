@@ -23,8 +23,17 @@ st.set_page_config(
     layout="centered"
 )
 
+# Display labels per difficulty level
+_DIFF_LABELS = {1: "🟢 Easy", 2: "🟡 Medium", 3: "🔴 Hard"}
+_DIFF_NAMES = {1: "Easy", 2: "Medium", 3: "Hard"}
+_DIFF_CHOICES = {
+    1: "🟢 Easy (Addition & Subtraction, 1-10)",
+    2: "🟡 Medium (All operations, 10-20)",
+    3: "🔴 Hard (All operations, 20-50)"
+}
+
 # Custom CSS
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -68,11 +77,39 @@ st.markdown("""
         text-align: center;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _get_engine():
+    """Shared pretrained ML engine, built once per server process"""
+    return AdaptiveEngine()
+
+# Static sidebar text (no session dependency)
+_SIDEBAR_ABOUT = """
+    This is an **AI-Powered Adaptive Learning System** that uses:
+    - **Machine Learning** (Logistic Regression)
+    - Real-time performance tracking
+    - Dynamic difficulty adjustment
+    
+    The system adapts to your performance to keep you in the optimal learning zone!
+    """
+
+_SIDEBAR_FEATURES = """
+    - ✨ ML-powered adaptation
+    - 📊 Real-time tracking
+    - 🎯 3 difficulty levels
+    - 📈 Detailed analytics
+    - 🤖 Transparent AI
+    """
+
+def _inject_css():
+    """Emit the custom stylesheet (full-script runs only; fragment reruns keep it)"""
+    st.markdown(_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 def init_session_state():
-    """Initialize all session state variables"""
+    """Initialize all session state variables and page styling"""
+    _inject_css()
     if 'initialized' not in st.session_state:
         st.session_state.initialized = True
         st.session_state.game_state = 'welcome'
@@ -82,7 +119,7 @@ def init_session_state():
         st.session_state.max_puzzles = 10
         st.session_state.generator = PuzzleGenerator()
         st.session_state.tracker = PerformanceTracker()
-        st.session_state.engine = AdaptiveEngine()
+        st.session_state.engine = _get_engine()
         st.session_state.current_puzzle = None
         st.session_state.start_time = None
         st.session_state.feedback = None
@@ -91,11 +128,12 @@ def init_session_state():
 def start_game(name, difficulty):
     """Start a new game session"""
     st.session_state.user_name = name
+    # Seeded by name so a player's session can be replayed for A/B comparisons
+    st.session_state.generator = PuzzleGenerator(seed=name)
     st.session_state.current_difficulty = difficulty
     st.session_state.game_state = 'playing'
     st.session_state.puzzle_count = 0
-    st.session_state.tracker = PerformanceTracker()
-    st.session_state.engine = AdaptiveEngine()
+    st.session_state.tracker.reset()
     generate_new_puzzle()
 
 def generate_new_puzzle():
@@ -103,78 +141,73 @@ def generate_new_puzzle():
     st.session_state.current_puzzle = st.session_state.generator.generate_puzzle(
         st.session_state.current_difficulty
     )
-    st.session_state.start_time = time.time()
+    st.session_state.start_time = time.perf_counter_ns()
     st.session_state.feedback = None
     st.session_state.show_next_button = False
 
 def submit_answer(answer):
     """Process submitted answer - CORRECTED VERSION"""
-    if st.session_state.current_puzzle is None:
+    puzzle = st.session_state.current_puzzle
+    if puzzle is None:
         return
     
     # Calculate time taken
-    time_taken = time.time() - st.session_state.start_time
+    time_taken = (time.perf_counter_ns() - st.session_state.start_time) / 1e9
     
     # Get correct answer
-    correct_answer = st.session_state.current_puzzle['answer']
+    correct_answer = puzzle['answer']
     
     # Check correctness
-    is_correct = abs(float(answer) - correct_answer) < 0.01
+    if puzzle['exact']:
+        is_correct = answer == correct_answer
+    else:
+        is_correct = abs(answer - correct_answer) < 0.01
     
-    # Create puzzle string
-    puzzle_str = f"{st.session_state.current_puzzle['num1']} {st.session_state.current_puzzle['operation']} {st.session_state.current_puzzle['num2']}"
+    old_difficulty = st.session_state.current_difficulty
+    tracker = st.session_state.tracker
     
     # Record performance - using correct method
-    st.session_state.tracker.record_performance(
-        puzzle=puzzle_str,
-        user_answer=float(answer),
+    tracker.record_performance(
+        puzzle=puzzle['text'],
+        user_answer=answer,
         correct_answer=correct_answer,
         is_correct=is_correct,
         time_taken=time_taken,
-        difficulty=st.session_state.current_difficulty
+        difficulty=old_difficulty
     )
     
-    # Store feedback
-    st.session_state.feedback = {
+    # Build feedback locally; session state is written once at the end
+    feedback = {
         'is_correct': is_correct,
         'time': time_taken,
         'correct_answer': correct_answer,
-        'user_answer': float(answer)
+        'user_answer': answer
     }
+    puzzle_count = st.session_state.puzzle_count + 1
     
-    # Increment puzzle count
-    st.session_state.puzzle_count += 1
-    
-    # Show next button
-    st.session_state.show_next_button = True
-    
-    # Check if session is complete
-    if st.session_state.puzzle_count >= st.session_state.max_puzzles:
+    if puzzle_count >= st.session_state.max_puzzles:
+        # Session complete
         st.session_state.game_state = 'summary'
-        return
-    
-    # Get recent performance metrics
-    recent_perf = st.session_state.tracker.get_recent_performance(n=3)
-    
-    # Store old difficulty
-    old_difficulty = st.session_state.current_difficulty
-    
-    # CORRECTED: Predict next difficulty using the correct method
-    st.session_state.current_difficulty = st.session_state.engine.predict_next_difficulty(
-        recent_perf,
-        st.session_state.current_difficulty
-    )
-    
-    # Store difficulty change info
-    if old_difficulty != st.session_state.current_difficulty:
-        st.session_state.feedback['difficulty_changed'] = True
-        st.session_state.feedback['old_difficulty'] = old_difficulty
-        st.session_state.feedback['new_difficulty'] = st.session_state.current_difficulty
+    else:
+        # Predict next difficulty from the tracker's recent window
+        new_difficulty = st.session_state.engine.adapt_difficulty(tracker, old_difficulty)
         
-        if st.session_state.current_difficulty > old_difficulty:
-            st.session_state.feedback['change_reason'] = 'Excellent performance! Level UP! 🚀'
-        else:
-            st.session_state.feedback['change_reason'] = 'Let\'s practice at this level 💪'
+        # Store difficulty change info
+        if new_difficulty != old_difficulty:
+            feedback['difficulty_changed'] = True
+            feedback['old_difficulty'] = old_difficulty
+            feedback['new_difficulty'] = new_difficulty
+            
+            if new_difficulty > old_difficulty:
+                feedback['change_reason'] = 'Excellent performance! Level UP! 🚀'
+            else:
+                feedback['change_reason'] = 'Let\'s practice at this level 💪'
+            
+            st.session_state.current_difficulty = new_difficulty
+    
+    st.session_state.feedback = feedback
+    st.session_state.puzzle_count = puzzle_count
+    st.session_state.show_next_button = True
 
 def next_puzzle():
     """Move to next puzzle"""
@@ -188,48 +221,26 @@ def reset_game():
     st.session_state.feedback = None
     st.session_state.show_next_button = False
 
-# Initialize
-init_session_state()
+def _on_submit():
+    """Submit button callback"""
+    answer = st.session_state.answer_input
+    if answer is not None:
+        submit_answer(answer)
 
-# Main UI
-if st.session_state.game_state == 'welcome':
-    # Welcome Screen
-    st.markdown('<p class="main-header">🧮 Math Adventures</p>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">AI-Powered Adaptive Learning System</p>', unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.markdown("### 📚 How it works:")
-        st.info("""
-        - You'll solve 10 math problems
-        - The system uses **Machine Learning** to adapt difficulty
-        - Performance is tracked in real-time
-        - Get personalized recommendations
-        """)
-        
-        name = st.text_input("👤 Enter your name:", key="name_input")
-        
-        st.markdown("### 🎯 Choose starting difficulty:")
-        difficulty = st.radio(
-            "",
-            [1, 2, 3],
-            format_func=lambda x: ["🟢 Easy (Addition & Subtraction, 1-10)", 
-                                    "🟡 Medium (All operations, 10-20)", 
-                                    "🔴 Hard (All operations, 20-50)"][x-1],
-            key="difficulty_input"
-        )
-        
-        st.markdown("")
-        if st.button("🚀 Start Adventure!", type="primary", use_container_width=True):
-            if name.strip():
-                start_game(name, difficulty)
-                st.rerun()
-            else:
-                st.error("Please enter your name!")
+def _on_next():
+    """Next button callback"""
+    if st.session_state.puzzle_count >= st.session_state.max_puzzles:
+        st.session_state.game_state = 'summary'
+    else:
+        next_puzzle()
 
-elif st.session_state.game_state == 'playing':
+@st.fragment
+def _play_screen():
+    """Playing screen; Submit/Next only rerun this fragment, not the whole script"""
+    # Leaving the playing screen needs a full rerun to draw the summary
+    if st.session_state.game_state != 'playing':
+        st.rerun()
+    
     # Playing Screen
     st.markdown(f'<p class="main-header">Hello, {st.session_state.user_name}! 👋</p>', unsafe_allow_html=True)
     
@@ -241,25 +252,20 @@ elif st.session_state.game_state == 'playing':
     with col1:
         st.metric("Problem", f"{st.session_state.puzzle_count + 1}/{st.session_state.max_puzzles}")
     with col2:
-        difficulty_labels = {1: "🟢 Easy", 2: "🟡 Medium", 3: "🔴 Hard"}
-        st.metric("Difficulty", difficulty_labels[st.session_state.current_difficulty])
+        st.metric("Difficulty", _DIFF_LABELS[st.session_state.current_difficulty])
     
     st.markdown("---")
     
     # Display current puzzle
     if st.session_state.current_puzzle:
-        puzzle_text = f"{st.session_state.current_puzzle['num1']} {st.session_state.current_puzzle['operation']} {st.session_state.current_puzzle['num2']} = ?"
-        st.markdown(f'<div class="problem-display">{puzzle_text}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="problem-display">{st.session_state.current_puzzle["text"]} = ?</div>', unsafe_allow_html=True)
     
     # Answer input and submit
     if not st.session_state.show_next_button:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            answer = st.number_input("Your answer:", key="answer_input", label_visibility="collapsed")
-            if st.button("Submit Answer", type="primary", use_container_width=True):
-                if answer is not None:
-                    submit_answer(answer)
-                    st.rerun()
+            st.number_input("Your answer:", key="answer_input", label_visibility="collapsed")
+            st.button("Submit Answer", type="primary", use_container_width=True, on_click=_on_submit)
     
     # Display feedback
     if st.session_state.feedback:
@@ -291,24 +297,68 @@ elif st.session_state.game_state == 'playing':
         if st.session_state.show_next_button:
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
-                if st.button("Next Problem ➡️", type="primary", use_container_width=True):
-                    if st.session_state.puzzle_count >= st.session_state.max_puzzles:
-                        st.session_state.game_state = 'summary'
-                    else:
-                        next_puzzle()
-                    st.rerun()
-    
-    # Current stats
+                st.button("Next Problem ➡️", type="primary", use_container_width=True, on_click=_on_next)
+    
+    # Current stats (each tracker value read once per rerun)
+    tracker = st.session_state.tracker
+    correct = tracker.get_correct_count()
+    total = tracker.get_total_problems()
+    acc = tracker.calculate_accuracy()
+    avg_time = tracker.calculate_avg_time()
+    
     st.markdown("---")
     st.markdown("### 📊 Current Session Stats")
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("✅ Correct", st.session_state.tracker.get_correct_count())
+        st.metric("✅ Correct", correct)
     with col2:
-        st.metric("❌ Incorrect", st.session_state.tracker.get_incorrect_count())
+        st.metric("❌ Incorrect", total - correct)
     with col3:
-        acc = st.session_state.tracker.calculate_accuracy()
         st.metric("🎯 Accuracy", f"{acc:.0f}%")
+    with col4:
+        st.metric("⏱️ Avg Time", f"{avg_time:.1f}s")
+
+# Initialize
+init_session_state()
+
+# Main UI
+if st.session_state.game_state == 'welcome':
+    # Welcome Screen
+    st.markdown('<p class="main-header">🧮 Math Adventures</p>', unsafe_allow_html=True)
+    st.markdown('<p class="sub-header">AI-Powered Adaptive Learning System</p>', unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.markdown("### 📚 How it works:")
+        st.info("""
+        - You'll solve 10 math problems
+        - The system uses **Machine Learning** to adapt difficulty
+        - Performance is tracked in real-time
+        - Get personalized recommendations
+        """)
+        
+        name = st.text_input("👤 Enter your name:", key="name_input")
+        
+        st.markdown("### 🎯 Choose starting difficulty:")
+        difficulty = st.radio(
+            "",
+            [1, 2, 3],
+            format_func=_DIFF_CHOICES.get,
+            key="difficulty_input"
+        )
+        
+        st.markdown("")
+        if st.button("🚀 Start Adventure!", type="primary", use_container_width=True):
+            if name.strip():
+                start_game(name, difficulty)
+                st.rerun()
+            else:
+                st.error("Please enter your name!")
+
+elif st.session_state.game_state == 'playing':
+    _play_screen()
 
 elif st.session_state.game_state == 'summary':
     # Summary Screen
@@ -333,30 +383,30 @@ elif st.session_state.game_state == 'summary':
     
     # Performance by difficulty
     st.markdown("## 📈 Performance by Difficulty")
-    difficulty_labels = {1: "Easy", 2: "Medium", 3: "Hard"}
-    
     for level in [1, 2, 3]:
         perf = summary['performance_by_difficulty'][level]
         if perf['total'] > 0:
             acc = (perf['correct'] / perf['total']) * 100
-            st.markdown(f"**{difficulty_labels[level]}:** {perf['correct']}/{perf['total']} correct ({acc:.0f}%)")
+            st.markdown(f"**{_DIFF_NAMES[level]}:** {perf['correct']}/{perf['total']} correct ({acc:.0f}%)")
     
     st.markdown("---")
     
     # Detailed log
     st.markdown("## 📝 Detailed Problem Log")
     history = st.session_state.tracker.get_history()
+    # The log keeps only the most recent records; number them session-wide
+    first_problem = st.session_state.tracker.get_total_problems() - len(history) + 1
     
-    for i, record in enumerate(history, 1):
-        status = "✅" if record['correct'] else "❌"
-        diff_label = difficulty_labels[record['difficulty']]
+    for i, record in enumerate(history, first_problem):
+        status = "✅" if record.correct else "❌"
+        diff_label = _DIFF_NAMES[record.difficulty]
         
-        with st.expander(f"Problem {i}: {record['puzzle']} = {record['correct_answer']} {status}"):
+        with st.expander(f"Problem {i}: {record.puzzle} = {record.correct_answer} {status}"):
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.write(f"**Your answer:** {record['user_answer']}")
+                st.write(f"**Your answer:** {record.user_answer}")
             with col2:
-                st.write(f"**Time:** {record['time']:.1f}s")
+                st.write(f"**Time:** {record.time:.1f}s")
             with col3:
                 st.write(f"**Difficulty:** {diff_label}")
     
@@ -399,7 +449,7 @@ elif st.session_state.game_state == 'summary':
         - Take your time to understand each concept
         """)
     
-    st.markdown(f"**Recommended starting difficulty for next session:** {difficulty_labels[summary['recommended_difficulty']]}")
+    st.markdown(f"**Recommended starting difficulty for next session:** {_DIFF_NAMES[summary['recommended_difficulty']]}")
     
     st.markdown("---")
     
@@ -413,29 +463,8 @@ elif st.session_state.game_state == 'summary':
 # Sidebar
 with st.sidebar:
     st.markdown("### ℹ️ About")
-    st.info("""
-    This is an **AI-Powered Adaptive Learning System** that uses:
-    - **Machine Learning** (Logistic Regression)
-    - Real-time performance tracking
-    - Dynamic difficulty adjustment
-    
-    The system adapts to your performance to keep you in the optimal learning zone!
-    """)
+    st.info(_SIDEBAR_ABOUT)
     
     st.markdown("---")
     st.markdown("### 📚 Features")
-    st.markdown("""
-    - ✨ ML-powered adaptation
-    - 📊 Real-time tracking
-    - 🎯 3 difficulty levels
-    - 📈 Detailed analytics
-    - 🤖 Transparent AI
-    """)
-    
-    if st.session_state.game_state == 'playing':
-        st.markdown("---")
-        st.markdown("### 🎮 Quick Stats")
-        st.write(f"Problems: {st.session_state.puzzle_count}/{st.session_state.max_puzzles}")
-        st.write(f"Accuracy: {st.session_state.tracker.calculate_accuracy():.0f}%")
-        if st.session_state.tracker.get_total_problems() > 0:
-            st.write(f"Avg Time: {st.session_state.tracker.calculate_avg_time():.1f}s")
+    st.markdown(_SIDEBAR_FEATURES)
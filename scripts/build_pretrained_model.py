@@ -0,0 +1,31 @@
+"""
+Build the pretrained model parameters shipped with the adaptive engine
+
+Runs the synthetic-data pretraining once and saves the fitted parameters to
+src/pretrained_adaptive.npz, so AdaptiveEngine can load them at startup
+instead of fitting the model every time.
+
+Usage:
+    python scripts/build_pretrained_model.py
+"""
+
+import logging
+import sys
+import os
+
+# Add source directory to path to import modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from adaptive_engine import AdaptiveEngine, PRETRAINED_PATH
+
+
+def main():
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
+    engine = AdaptiveEngine(pretrained_path=None)
+    engine.save_pretrained(PRETRAINED_PATH)
+    print(f"Saved pretrained parameters to {os.path.relpath(PRETRAINED_PATH)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Optional numba support shared by the compiled kernel modules
+
+When numba is not installed, njit is a no-op decorator and the kernels run
+as plain Python with identical results. With numba the kernels are declared
+with explicit signatures, so they are compiled (or loaded from numba's
+on-disk cache) at import time rather than on the first call.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator used when numba is not installed"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,8 +1,29 @@
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
+import logging
+import os
+import threading
 import warnings
-warnings.filterwarnings('ignore')
+
+import numpy as np
+
+from adaptive_engine_jit import predict_proba, rule_based_next_difficulty
+
+logger = logging.getLogger(__name__)
+
+# Fitted model parameters shipped with the package
+# (rebuild with scripts/build_pretrained_model.py)
+PRETRAINED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pretrained_adaptive.npz')
+
+# Performance metrics used as model features, in feature column order
+# (the current difficulty is the last feature)
+METRIC_KEYS = ('accuracy', 'avg_time', 'correct_streak', 'incorrect_streak', 'trend')
+
+# Next difficulty indexed by [model class][current difficulty], clamped to 1-3
+# Classes: 0 = decrease, 1 = stay, 2 = increase
+NEXT_DIFFICULTY = (
+    (None, 1, 1, 2),
+    (None, 1, 2, 3),
+    (None, 2, 3, 3)
+)
 
 
 class AdaptiveEngine:
@@ -22,18 +43,36 @@ class AdaptiveEngine:
     - Current difficulty level
     """
     
-    def __init__(self):
-        # Initialize ML model
-        self.model = LogisticRegression(
-            multi_class='multinomial',
-            solver='lbfgs',
-            max_iter=1000,
-            random_state=42
-        )
-        self.scaler = StandardScaler()
+    # Number of most recent problems the model looks at
+    RECENT_WINDOW = 3
+    
+    def __init__(self, pretrained_path=PRETRAINED_PATH, shm_name=None):
+        """
+        Args:
+            pretrained_path (str): Saved model parameters to load; when None or
+                missing, the model is pretrained from scratch instead
+            shm_name (str): Shared memory block published with
+                pretrained_shm.publish_parameters; takes precedence over
+                pretrained_path
+        """
+        # sklearn model and scaler; only set when the model is fitted in-process
+        self.model = None
+        self.scaler = None
         
-        # Pretrain with synthetic data (simulates experienced students)
-        self._pretrain_model()
+        # Shared memory handle backing the parameters, if attached to one
+        self._shm = None
+        
+        if shm_name is not None:
+            self._attach_shared(shm_name)
+        elif pretrained_path is not None and os.path.exists(pretrained_path):
+            self._load_pretrained(pretrained_path)
+        else:
+            # Pretrain with synthetic data (simulates experienced students)
+            self._pretrain_model()
+        
+        # Reusable feature vector, one per thread: a single engine is shared
+        # by all sessions of the web demo
+        self._local = threading.local()
         
         # Track predictions
         self.prediction_count = 0
@@ -44,119 +83,205 @@ class AdaptiveEngine:
         Pretrain model with synthetic data representing various student behaviors
         This allows the model to work immediately without needing real training data
         """
-        np.random.seed(42)
+        # sklearn is only needed to fit the model, not to predict
+        from sklearn.exceptions import ConvergenceWarning
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+        
+        self.model = LogisticRegression(
+            multi_class='multinomial',
+            solver='lbfgs',
+            max_iter=1000,
+            random_state=42
+        )
+        self.scaler = StandardScaler()
+        
+        rng = np.random.default_rng(42)
         
         # Generate synthetic training data
         # Features: [accuracy, avg_time, correct_streak, incorrect_streak, trend, current_difficulty]
         # Labels: 0 (decrease), 1 (stay), 2 (increase)
-        
-        training_data = []
-        training_labels = []
+        # Each scenario fills its own block of rows
+        X_train = np.empty((350, 6), dtype=np.float64)
+        y_train = np.empty(350, dtype=np.int64)
         
         # Scenario 1: High performers (should increase difficulty)
-        for _ in range(100):
-            accuracy = np.random.uniform(80, 100)
-            avg_time = np.random.uniform(2, 5)
-            correct_streak = np.random.randint(2, 4)
-            incorrect_streak = 0
-            trend = 1
-            current_diff = np.random.randint(1, 3)
-            
-            training_data.append([accuracy, avg_time, correct_streak, incorrect_streak, trend, current_diff])
-            training_labels.append(2)  # Increase difficulty
+        block = slice(0, 100)
+        X_train[block, 0] = rng.uniform(80, 100, 100)   # accuracy
+        X_train[block, 1] = rng.uniform(2, 5, 100)      # avg_time
+        X_train[block, 2] = rng.integers(2, 4, 100)     # correct_streak
+        X_train[block, 3] = 0                           # incorrect_streak
+        X_train[block, 4] = 1                           # trend
+        X_train[block, 5] = rng.integers(1, 3, 100)     # current_diff
+        y_train[block] = 2  # Increase difficulty
         
         # Scenario 2: Struggling students (should decrease difficulty)
-        for _ in range(100):
-            accuracy = np.random.uniform(0, 40)
-            avg_time = np.random.uniform(8, 15)
-            correct_streak = 0
-            incorrect_streak = np.random.randint(2, 4)
-            trend = -1
-            current_diff = np.random.randint(2, 4)
-            
-            training_data.append([accuracy, avg_time, correct_streak, incorrect_streak, trend, current_diff])
-            training_labels.append(0)  # Decrease difficulty
+        block = slice(100, 200)
+        X_train[block, 0] = rng.uniform(0, 40, 100)
+        X_train[block, 1] = rng.uniform(8, 15, 100)
+        X_train[block, 2] = 0
+        X_train[block, 3] = rng.integers(2, 4, 100)
+        X_train[block, 4] = -1
+        X_train[block, 5] = rng.integers(2, 4, 100)
+        y_train[block] = 0  # Decrease difficulty
         
         # Scenario 3: Average performance (stay same)
-        for _ in range(100):
-            accuracy = np.random.uniform(50, 75)
-            avg_time = np.random.uniform(5, 8)
-            correct_streak = np.random.randint(0, 2)
-            incorrect_streak = np.random.randint(0, 2)
-            trend = 0
-            current_diff = np.random.randint(1, 4)
-            
-            training_data.append([accuracy, avg_time, correct_streak, incorrect_streak, trend, current_diff])
-            training_labels.append(1)  # Stay same
+        block = slice(200, 300)
+        X_train[block, 0] = rng.uniform(50, 75, 100)
+        X_train[block, 1] = rng.uniform(5, 8, 100)
+        X_train[block, 2] = rng.integers(0, 2, 100)
+        X_train[block, 3] = rng.integers(0, 2, 100)
+        X_train[block, 4] = 0
+        X_train[block, 5] = rng.integers(1, 4, 100)
+        y_train[block] = 1  # Stay same
         
         # Scenario 4: Mixed performance patterns
-        for _ in range(50):
-            accuracy = np.random.uniform(60, 85)
-            avg_time = np.random.uniform(4, 7)
-            correct_streak = np.random.randint(1, 3)
-            incorrect_streak = 0
-            trend = np.random.choice([-1, 0, 1])
-            current_diff = np.random.randint(1, 3)
-            
-            # Decision based on multiple factors
-            if accuracy > 75 and avg_time < 6:
-                label = 2
-            elif accuracy < 55:
-                label = 0
-            else:
-                label = 1
-            
-            training_data.append([accuracy, avg_time, correct_streak, incorrect_streak, trend, current_diff])
-            training_labels.append(label)
-        
-        # Train the model
-        X_train = np.array(training_data)
-        y_train = np.array(training_labels)
+        block = slice(300, 350)
+        accuracy = rng.uniform(60, 85, 50)
+        avg_time = rng.uniform(4, 7, 50)
+        X_train[block, 0] = accuracy
+        X_train[block, 1] = avg_time
+        X_train[block, 2] = rng.integers(1, 3, 50)
+        X_train[block, 3] = 0
+        X_train[block, 4] = rng.choice([-1, 0, 1], 50)
+        X_train[block, 5] = rng.integers(1, 3, 50)
+        
+        # Decision based on multiple factors
+        y_train[block] = np.select([(accuracy > 75) & (avg_time < 6), accuracy < 55], [2, 0], default=1)
         
         # Scale features
         X_train_scaled = self.scaler.fit_transform(X_train)
         
-        # Fit model
-        self.model.fit(X_train_scaled, y_train)
+        # Fit model; only convergence warnings are silenced, and only here
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            self.model.fit(X_train_scaled, y_train)
         
-        print("✅ ML Model pretrained with synthetic data")
-        print(f"   Training samples: {len(training_data)}")
-        print(f"   Model accuracy on training: {self.model.score(X_train_scaled, y_train):.2%}\n")
+        self._set_parameters(
+            self.scaler.mean_, self.scaler.scale_, self.model.coef_, self.model.intercept_
+        )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "✅ ML Model pretrained with synthetic data\n"
+                "   Training samples: %d\n"
+                "   Model accuracy on training: %.2f%%",
+                len(X_train), 100 * self.model.score(X_train_scaled, y_train)
+            )
+    
+    def _set_parameters(self, mu, sigma, W, b):
+        """
+        Install fitted model parameters used for prediction
+        
+        The scaler is folded into the weights, so a prediction is a single
+        affine map plus softmax on the raw features:
+        W @ ((x - mu) / sigma) + b == (W / sigma) @ x + (b - W @ (mu / sigma))
+        
+        Args:
+            mu (np.array): Scaler means, shape (6,)
+            sigma (np.array): Scaler standard deviations, shape (6,)
+            W (np.array): Model coefficients, shape (3, 6)
+            b (np.array): Model intercepts, shape (3,)
+        """
+        self._mu = np.ascontiguousarray(mu, dtype=np.float64)
+        self._sigma = np.ascontiguousarray(sigma, dtype=np.float64)
+        self._W = np.ascontiguousarray(W, dtype=np.float64)
+        self._b = np.ascontiguousarray(b, dtype=np.float64)
+        
+        self._W_folded = np.ascontiguousarray(self._W / self._sigma)
+        self._b_folded = self._b - self._W @ (self._mu / self._sigma)
+    
+    def _load_pretrained(self, path):
+        """Load model parameters saved by save_pretrained"""
+        with np.load(path) as params:
+            self._set_parameters(params['mean'], params['scale'], params['coef'], params['intercept'])
+        
+        logger.debug("✅ ML Model loaded from pretrained parameters")
+    
+    def _attach_shared(self, shm_name):
+        """Predict from folded weights published in shared memory by another process"""
+        from pretrained_shm import attach_parameters
+        
+        # The weights stay views into the block (no copy), so keep it open
+        self._shm, W, b = attach_parameters(shm_name)
+        self._W_folded = W
+        self._b_folded = b
+        
+        # Folded weights are the model itself under an identity scaler, which
+        # is what save_pretrained and publish_parameters work from
+        self._mu = np.zeros(W.shape[1])
+        self._sigma = np.ones(W.shape[1])
+        self._W = W
+        self._b = b
+        
+        logger.debug("✅ ML Model attached to shared parameters %r", shm_name)
+    
+    def close(self):
+        """Detach from the shared memory block the weights live in, if any"""
+        if getattr(self, '_shm', None) is not None:
+            # The block can only be closed once no views into it remain
+            self._W_folded = self._b_folded = self._W = self._b = None
+            self._shm.close()
+            self._shm = None
+    
+    def __del__(self):
+        """Close any shared memory block before the weight views are freed"""
+        self.close()
+    
+    def save_pretrained(self, path=PRETRAINED_PATH):
+        """
+        Save the fitted model parameters so later engines can skip pretraining
+        
+        Args:
+            path (str): Destination .npz file
+        """
+        np.savez(path, mean=self._mu, scale=self._sigma, coef=self._W, intercept=self._b)
     
     def _extract_features(self, performance_metrics, current_difficulty):
         """
         Extract features from performance metrics for ML model
         
+        The vector is written into this thread's reusable buffer, so it is
+        only valid until the next call on the same thread.
+        
         Args:
             performance_metrics (dict): Recent performance data
             current_difficulty (int): Current difficulty level
         
         Returns:
-            np.array: Feature vector
+            np.array: Feature vector of shape (6,)
         """
-        features = [
-            performance_metrics['accuracy'],
-            performance_metrics['avg_time'],
-            performance_metrics['correct_streak'],
-            performance_metrics['incorrect_streak'],
-            performance_metrics['trend'],
-            current_difficulty
-        ]
+        features = getattr(self._local, 'features', None)
+        if features is None:
+            features = self._local.features = np.empty(6, dtype=np.float64)
+        
+        features[0] = performance_metrics['accuracy']
+        features[1] = performance_metrics['avg_time']
+        features[2] = performance_metrics['correct_streak']
+        features[3] = performance_metrics['incorrect_streak']
+        features[4] = performance_metrics['trend']
+        features[5] = current_difficulty
         
-        return np.array(features).reshape(1, -1)
+        return features
     
-    def update_difficulty(self, performance_metrics, current_difficulty):
+    def adapt_difficulty(self, tracker, current_difficulty):
         """
-        Update difficulty level using ML model (alias for predict_next_difficulty)
+        Pick the next difficulty level from a tracker's recent performance
+        
+        This is the single entry point used by the apps; it reads the fixed
+        recent window straight from the tracker.
         
         Args:
-            performance_metrics (dict): Recent performance data
+            tracker (PerformanceTracker): Tracker for the current session
             current_difficulty (int): Current difficulty level (1-3)
         
         Returns:
-            int: Updated difficulty level (1-3)
+            int: Next difficulty level (1-3)
         """
-        return self.predict_next_difficulty(performance_metrics, current_difficulty)
+        return self.predict_next_difficulty(
+            tracker.get_recent_performance(self.RECENT_WINDOW),
+            current_difficulty
+        )
     
     def predict_next_difficulty(self, performance_metrics, current_difficulty):
         """
@@ -176,31 +301,54 @@ class AdaptiveEngine:
         # Extract features
         features = self._extract_features(performance_metrics, current_difficulty)
         
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
+        # Evaluate the logits and softmax in one compiled kernel
+        prediction, probabilities = predict_proba(features, self._W_folded, self._b_folded)
+        prediction = int(prediction)
         
         # Get confidence of prediction
-        self.last_confidence = np.max(probabilities)
+        self.last_confidence = float(probabilities[prediction])
         self.prediction_count += 1
         
         # Map prediction to difficulty
-        # 0 = decrease, 1 = stay, 2 = increase
-        if prediction == 2:  # Increase
-            next_difficulty = min(current_difficulty + 1, 3)
-        elif prediction == 0:  # Decrease
-            next_difficulty = max(current_difficulty - 1, 1)
-        else:  # Stay
-            next_difficulty = current_difficulty
+        next_difficulty = NEXT_DIFFICULTY[prediction][current_difficulty]
         
         # Log prediction (for debugging)
-        self._log_prediction(performance_metrics, current_difficulty, next_difficulty, probabilities)
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_prediction(performance_metrics, current_difficulty, next_difficulty, probabilities)
         
         return next_difficulty
     
+    def predict_next_difficulty_batch(self, metrics_array, current_diffs):
+        """
+        Predict next difficulty levels for many players at once
+        
+        Unlike predict_next_difficulty there is no rule-based fallback for short
+        windows and nothing is logged; every row goes through the ML model.
+        
+        Args:
+            metrics_array (np.ndarray): Recent performance, shape (N, 5), columns
+                in METRIC_KEYS order
+            current_diffs (np.ndarray): Current difficulty levels (1-3), shape (N,)
+        
+        Returns:
+            np.ndarray: Predicted next difficulty levels (1-3), shape (N,)
+        """
+        current_diffs = np.asarray(current_diffs)
+        features = np.column_stack((np.asarray(metrics_array, dtype=np.float64), current_diffs))
+        
+        logits = features @ self._W_folded.T + self._b_folded
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        predictions = probabilities.argmax(axis=1)
+        
+        if len(predictions):
+            self.last_confidence = float(probabilities[-1, predictions[-1]])
+        self.prediction_count += len(predictions)
+        
+        # Classes 0/1/2 are a -1/0/+1 step, clamped at the level bounds
+        # (same mapping as NEXT_DIFFICULTY)
+        return np.clip(current_diffs + predictions - 1, 1, 3)
+    
     def _rule_based_fallback(self, performance_metrics, current_difficulty):
         """
         Simple rule-based system for when ML model doesn't have enough data
@@ -212,27 +360,25 @@ class AdaptiveEngine:
         Returns:
             int: Next difficulty level
         """
-        accuracy = performance_metrics['accuracy']
-        avg_time = performance_metrics['avg_time']
-        
-        # Simple scoring system
-        performance_score = accuracy * 0.7 + max(0, 30 - avg_time) * 0.3
-        
-        if performance_score > 75 and current_difficulty < 3:
-            return current_difficulty + 1
-        elif performance_score < 40 and current_difficulty > 1:
-            return current_difficulty - 1
-        else:
-            return current_difficulty
+        return int(rule_based_next_difficulty(
+            float(performance_metrics['accuracy']),
+            float(performance_metrics['avg_time']),
+            int(current_difficulty)
+        ))
     
     def _log_prediction(self, metrics, current_diff, predicted_diff, probabilities):
         """Log ML predictions for debugging and transparency"""
-        print(f"\n🤖 ML Model Prediction #{self.prediction_count}")
-        print(f"   Current Difficulty: {current_diff}")
-        print(f"   Predicted Difficulty: {predicted_diff}")
-        print(f"   Confidence: {self.last_confidence:.2%}")
-        print(f"   Probabilities: Decrease={probabilities[0]:.2%}, Stay={probabilities[1]:.2%}, Increase={probabilities[2]:.2%}")
-        print(f"   Based on: Accuracy={metrics['accuracy']:.1f}%, Time={metrics['avg_time']:.1f}s, Streak={metrics['correct_streak']}")
+        logger.debug(
+            "🤖 ML Model Prediction #%d\n"
+            "   Current Difficulty: %d\n"
+            "   Predicted Difficulty: %d\n"
+            "   Confidence: %.2f%%\n"
+            "   Probabilities: Decrease=%.2f%%, Stay=%.2f%%, Increase=%.2f%%\n"
+            "   Based on: Accuracy=%.1f%%, Time=%.1fs, Streak=%d",
+            self.prediction_count, current_diff, predicted_diff, 100 * self.last_confidence,
+            100 * probabilities[0], 100 * probabilities[1], 100 * probabilities[2],
+            metrics['accuracy'], metrics['avg_time'], metrics['correct_streak']
+        )
     
     def get_model_info(self):
         """Get information about the ML model"""
@@ -247,6 +393,8 @@ class AdaptiveEngine:
 
 # Testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    
     engine = AdaptiveEngine()
     
     print("\n" + "=" * 60)
@@ -293,10 +441,15 @@ if __name__ == "__main__":
         }
     ]
     
-    for scenario in test_scenarios:
+    # Score all scenarios in one batch
+    metrics_array = np.array([[scenario['metrics'][key] for key in METRIC_KEYS]
+                              for scenario in test_scenarios])
+    current_diffs = np.array([scenario['current_diff'] for scenario in test_scenarios])
+    predicted = engine.predict_next_difficulty_batch(metrics_array, current_diffs)
+    
+    for scenario, next_diff in zip(test_scenarios, predicted):
         print(f"\n--- {scenario['name']} ---")
-        predicted = engine.predict_next_difficulty(scenario['metrics'], scenario['current_diff'])
-        print(f"Result: {scenario['current_diff']} → {predicted}")
+        print(f"Result: {scenario['current_diff']} → {next_diff}")
     
     print("\n" + "=" * 60)
     print("Model Info:")
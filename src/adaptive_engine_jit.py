@@ -0,0 +1,58 @@
+"""
+Compiled numeric kernels for the adaptive engine
+
+The rule-based difficulty step and the logistic model inference.
+"""
+
+import numpy as np
+
+from _jit import njit
+
+
+# Rule-based fallback thresholds on the performance score
+LEVEL_UP_SCORE = 75.0
+LEVEL_DOWN_SCORE = 40.0
+
+
+@njit('i8(f8, f8, i8)', cache=True, fastmath=True)
+def rule_based_next_difficulty(accuracy, avg_time, current_difficulty):
+    """
+    Next difficulty from the rule-based performance score
+
+    Args:
+        accuracy (float): Recent accuracy percentage (0-100)
+        avg_time (float): Recent average response time in seconds
+        current_difficulty (int): Current difficulty level (1-3)
+
+    Returns:
+        int: Next difficulty level (1-3)
+    """
+    performance_score = accuracy * 0.7 + max(0.0, 30.0 - avg_time) * 0.3
+
+    # Branchless: +1, 0 or -1 step, clamped at the level bounds
+    step_up = (performance_score > LEVEL_UP_SCORE) * (current_difficulty < 3)
+    step_down = (performance_score < LEVEL_DOWN_SCORE) * (current_difficulty > 1)
+    return current_difficulty + step_up - step_down
+
+
+@njit('Tuple((i8, f8[:]))(f8[:], f8[:, :], f8[:])', cache=True, fastmath=True)
+def predict_proba(features, W, b):
+    """
+    Multinomial logistic regression on a single feature vector
+
+    Args:
+        features (np.ndarray): Raw feature vector, shape (n_features,)
+        W (np.ndarray): Coefficients with the feature scaling folded in,
+            shape (n_classes, n_features)
+        b (np.ndarray): Intercepts with the feature scaling folded in,
+            shape (n_classes,)
+
+    Returns:
+        tuple: (predicted class, class probabilities)
+    """
+    logits = (W * features).sum(axis=1) + b
+
+    # Softmax (shifted by the max for numerical stability)
+    probabilities = np.exp(logits - logits.max())
+    probabilities /= probabilities.sum()
+    return np.argmax(probabilities), probabilities
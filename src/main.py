@@ -3,6 +3,8 @@ from tracker import PerformanceTracker
 from adaptive_engine import AdaptiveEngine
 import time
 
+DIFFICULTY_NAMES = {1: 'EASY', 2: 'MEDIUM', 3: 'HARD'}
+
 def main():
     print("=" * 50)
     print("🎓 MATH ADVENTURES - Adaptive Learning System")
@@ -24,31 +26,32 @@ def main():
     print("3. Hard (ages 9-10)")
     
     choice = input("Enter choice (1-3): ").strip()
-    difficulty_map = {'1': 'easy', '2': 'medium', '3': 'hard'}
-    current_difficulty = difficulty_map.get(choice, 'medium')
+    current_difficulty = int(choice) if choice in ('1', '2', '3') else 2
     
-    print(f"\nStarting at {current_difficulty.upper()} level!")
+    print(f"\nStarting at {DIFFICULTY_NAMES[current_difficulty]} level!")
     print("\nAnswer 10 questions. Let's begin!\n")
     
     # Main game loop
     max_puzzles = 10
+    
+    # Generate the whole session up front; the rest is regenerated whenever
+    # the difficulty changes
+    puzzles = [generator.generate_puzzle(current_difficulty) for _ in range(max_puzzles)]
+    
     for i in range(max_puzzles):
         print(f"\n--- Question {i+1}/{max_puzzles} ---")
-        print(f"Current Level: {current_difficulty.upper()}")
+        print(f"Current Level: {DIFFICULTY_NAMES[current_difficulty]}")
         
-        # Generate puzzle
-        puzzle = generator.generate_puzzle(current_difficulty)
-        print(f"\n{puzzle['num1']} {puzzle['operation']} {puzzle['num2']} = ?")
+        puzzle = puzzles[i]
+        print(f"\n{puzzle['text']} = ?")
         
         # Get answer and measure time
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         try:
             user_answer = int(input("Your answer: "))
         except ValueError:
             user_answer = -999
-        end_time = time.time()
-        
-        response_time = (end_time - start_time) * 1000  # ms
+        response_time = (time.perf_counter_ns() - start_ns) / 1e9  # seconds
         is_correct = user_answer == puzzle['answer']
         
         # Feedback
@@ -59,28 +62,33 @@ def main():
         
         # Track performance
         tracker.record_attempt(
-            puzzle=puzzle,
+            puzzle=puzzle['text'],
             user_answer=user_answer,
-            correct=is_correct,
-            time_ms=response_time,
+            correct_answer=puzzle['answer'],
+            is_correct=is_correct,
+            time_taken=response_time,
             difficulty=current_difficulty
         )
         
         # Adapt difficulty
         if i >= 2:  # Need at least 3 attempts
-            new_difficulty = engine.adapt_difficulty(
-                tracker.get_recent_performance(3),
-                current_difficulty
-            )
+            new_difficulty = engine.adapt_difficulty(tracker, current_difficulty)
             if new_difficulty != current_difficulty:
-                print(f"\n🔄 Difficulty adjusted: {current_difficulty.upper()} → {new_difficulty.upper()}")
+                print(f"\n🔄 Difficulty adjusted: {DIFFICULTY_NAMES[current_difficulty]} → {DIFFICULTY_NAMES[new_difficulty]}")
+                puzzles[i + 1:] = [generator.generate_puzzle(new_difficulty)
+                                   for _ in range(max_puzzles - i - 1)]
             current_difficulty = new_difficulty
     
     # Display summary
     print("\n" + "=" * 50)
     print("📊 SESSION SUMMARY")
     print("=" * 50)
-    tracker.display_summary(player_name)
+    summary = tracker.get_summary()
+    print(f"Player: {player_name}")
+    print(f"Score: {summary['correct']}/{summary['total_problems']} ({summary['accuracy']:.1f}%)")
+    print(f"Average time: {summary['avg_time']:.1f}s")
+    print(f"Final level: {DIFFICULTY_NAMES[summary['final_difficulty']]}")
+    print(f"Recommended next level: {DIFFICULTY_NAMES[summary['recommended_difficulty']]}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+"""
+Share fitted adaptive engine parameters between processes
+
+A parent process publishes the inference weights (the model coefficients
+with the feature scaler folded in) once into a shared memory block; the
+worker processes it starts attach to it by name and predict directly from
+the shared pages instead of loading or refitting the model themselves.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# Model dimensions (6 features, 3 classes)
+N_FEATURES = 6
+N_CLASSES = 3
+
+# Folded weight arrays in block order, with their shapes
+_LAYOUT = (
+    ('W', (N_CLASSES, N_FEATURES)),
+    ('b', (N_CLASSES,))
+)
+_BLOCK_SIZE = sum(int(np.prod(shape)) for _, shape in _LAYOUT) * np.dtype(np.float64).itemsize
+
+
+def _views(shm):
+    """Float64 views of the weight arrays inside a shared memory block"""
+    views = []
+    offset = 0
+    for _, shape in _LAYOUT:
+        array = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+        views.append(array)
+        offset += array.nbytes
+    return views
+
+
+def publish_parameters(engine, name=None):
+    """
+    Copy an engine's folded inference weights into a new shared memory block
+
+    The caller owns the block: keep the returned handle alive while workers
+    use it, then close() and unlink() it.
+
+    Args:
+        engine (AdaptiveEngine): Engine with fitted parameters
+        name (str): Block name; generated when None
+
+    Returns:
+        SharedMemory: The new block (its name is what workers attach to)
+    """
+    shm = SharedMemory(name=name, create=True, size=_BLOCK_SIZE)
+    for view, array in zip(_views(shm), (engine._W_folded, engine._b_folded)):
+        view[...] = array
+    return shm
+
+
+def attach_parameters(name):
+    """
+    Attach to a block created by publish_parameters
+
+    Args:
+        name (str): Block name
+
+    Returns:
+        tuple: (shm, W, b) with the folded weights as views into shm, so shm
+            must stay open for as long as they are used
+    """
+    try:
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers the block with the
+        # resource tracker. Worker processes started by the publisher share
+        # its tracker, where this is a no-op; unrelated processes would
+        # unlink the block on exit
+        shm = SharedMemory(name=name)
+    return (shm, *_views(shm))
@@ -1,11 +1,55 @@
-import random
+import operator
+
+import numpy as np
+
+# Number of random draws fetched from the RNG at a time
+_RANDOM_BUFFER_SIZE = 1024
+
+# Arithmetic for each supported operation symbol
+_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv
+}
+
+# Hard division puzzles as (dividend, divisor, quotient): divisor 2-12 and
+# quotient 5-15, so every division comes out whole
+_DIV_TABLE = tuple((d * q, d, q) for d in range(2, 13) for q in range(5, 16))
 
 
 class PuzzleGenerator:
     """Generates math puzzles at different difficulty levels"""
     
-    def __init__(self):
-        self.operations = ['+', '-', '*', '/']
+    # Puzzle pools are the same for every generator, so build them once per process
+    _shared_pool = None
+    
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Optional seed (int or str) for a reproducible puzzle sequence
+        """
+        self.operations = ('+', '-', '*', '/')
+        
+        # Per-instance RNG, so seeded sessions are reproducible and independent
+        # of each other. Draws are fetched in batches and consumed one by one.
+        if isinstance(seed, str):
+            seed = int.from_bytes(seed.encode(), 'big')
+        self._rng = np.random.default_rng(seed)
+        self._random_buffer = self._rng.random(_RANDOM_BUFFER_SIZE)
+        self._random_index = 0
+        
+        # Every puzzle each level can produce, grouped by operation. Draws pick
+        # an operation and then a puzzle, which keeps the same odds as drawing
+        # the operands on the fly. Indexed directly by difficulty level.
+        if PuzzleGenerator._shared_pool is None:
+            PuzzleGenerator._shared_pool = (
+                None,
+                self._easy_puzzles(),
+                self._medium_puzzles(),
+                self._hard_puzzles()
+            )
+        self._pool = PuzzleGenerator._shared_pool
     
     def generate_puzzle(self, difficulty):
         """
@@ -15,122 +59,109 @@ class PuzzleGenerator:
             difficulty (int): 1 (Easy), 2 (Medium), or 3 (Hard)
         
         Returns:
-            dict: Puzzle with num1, num2, operation, and answer
+            dict: Puzzle with num1, num2, operation, answer, display text,
+                and whether the answer is a whole number (exact)
         """
-        if difficulty == 1:
-            return self._generate_easy()
-        elif difficulty == 2:
-            return self._generate_medium()
-        else:
-            return self._generate_hard()
+        by_operation = self._pool[difficulty if difficulty in (1, 2) else 3]
+        puzzles = by_operation[self._random_below(len(by_operation))]
+        # Copy so callers can't modify the shared pool entry
+        return dict(puzzles[self._random_below(len(puzzles))])
     
-    def _generate_easy(self):
-        """
-        Easy difficulty:
-        - Operations: Addition and Subtraction only
-        - Number range: 1-10
-        - No negative results
-        """
-        operation = random.choice(['+', '-'])
-        num1 = random.randint(1, 10)
-        num2 = random.randint(1, 10)
-        
-        # Ensure no negative results for subtraction
-        if operation == '-' and num2 > num1:
-            num1, num2 = num2, num1
-        
-        answer = self._calculate(num1, num2, operation)
-        
+    def _random_below(self, n):
+        """Uniform random integer in [0, n) from the buffered draws"""
+        if self._random_index == _RANDOM_BUFFER_SIZE:
+            self._random_buffer = self._rng.random(_RANDOM_BUFFER_SIZE)
+            self._random_index = 0
+        u = self._random_buffer[self._random_index]
+        self._random_index += 1
+        return int(u * n)
+    
+    def _make_puzzle(self, num1, num2, operation, difficulty, answer=None):
+        """Build a puzzle dict, including its preformatted text"""
+        if answer is None:
+            answer = self._calculate(num1, num2, operation)
         return {
             'num1': num1,
             'num2': num2,
             'operation': operation,
             'answer': answer,
-            'difficulty': 1
+            'difficulty': difficulty,
+            # Preformatted once so displays and logs don't rebuild it
+            'text': f"{num1} {operation} {num2}",
+            # Whole-number answers can be checked with == instead of a tolerance
+            'exact': float(answer).is_integer()
         }
     
-    def _generate_medium(self):
+    def _easy_puzzles(self):
+        """
+        Easy difficulty:
+        - Operations: Addition and Subtraction only
+        - Number range: 1-10
+        - No negative results
+        """
+        by_operation = []
+        for operation in ['+', '-']:
+            puzzles = []
+            for num1 in range(1, 11):
+                for num2 in range(1, 11):
+                    # Ensure no negative results for subtraction
+                    if operation == '-' and num2 > num1:
+                        puzzles.append(self._make_puzzle(num2, num1, operation, 1))
+                    else:
+                        puzzles.append(self._make_puzzle(num1, num2, operation, 1))
+            by_operation.append(puzzles)
+        return by_operation
+    
+    def _medium_puzzles(self):
         """
         Medium difficulty:
         - Operations: Addition, Subtraction, Multiplication
         - Number range: 1-20 for addition/subtraction, 1-12 for multiplication
         - No negative results
         """
-        operation = random.choice(['+', '-', '*'])
-        
-        if operation == '*':
-            # Times tables (1-12)
-            num1 = random.randint(2, 12)
-            num2 = random.randint(2, 12)
-        else:
-            # Addition and subtraction with larger numbers
-            num1 = random.randint(10, 20)
-            num2 = random.randint(1, 10)
-            
-            # Ensure no negative results for subtraction
-            if operation == '-' and num2 > num1:
-                num1, num2 = num2, num1
-        
-        answer = self._calculate(num1, num2, operation)
-        
-        return {
-            'num1': num1,
-            'num2': num2,
-            'operation': operation,
-            'answer': answer,
-            'difficulty': 2
-        }
+        by_operation = []
+        for operation in ['+', '-', '*']:
+            if operation == '*':
+                # Times tables (1-12)
+                pairs = [(a, b) for a in range(2, 13) for b in range(2, 13)]
+            else:
+                # Addition and subtraction with larger numbers; num1 >= num2,
+                # so subtraction never goes negative
+                pairs = [(a, b) for a in range(10, 21) for b in range(1, 11)]
+            by_operation.append([self._make_puzzle(a, b, operation, 2) for a, b in pairs])
+        return by_operation
     
-    def _generate_hard(self):
+    def _hard_puzzles(self):
         """
         Hard difficulty:
         - Operations: All four operations
         - Number range: 20-50 for add/sub, 5-15 for mult, controlled division
         - Division results in whole numbers
         """
-        operation = random.choice(self.operations)
-        
-        if operation == '*':
-            # Larger multiplication
-            num1 = random.randint(5, 15)
-            num2 = random.randint(5, 15)
-        elif operation == '/':
-            # Generate division that results in whole numbers
-            num2 = random.randint(2, 12)
-            quotient = random.randint(5, 15)
-            num1 = num2 * quotient
-        elif operation == '-':
-            # Subtraction with larger numbers
-            num1 = random.randint(20, 50)
-            num2 = random.randint(5, 20)
-            if num2 > num1:
-                num1, num2 = num2, num1
-        else:  # Addition
-            num1 = random.randint(20, 50)
-            num2 = random.randint(10, 30)
-        
-        answer = self._calculate(num1, num2, operation)
-        
-        return {
-            'num1': num1,
-            'num2': num2,
-            'operation': operation,
-            'answer': answer,
-            'difficulty': 3
-        }
+        by_operation = []
+        for operation in self.operations:
+            if operation == '*':
+                # Larger multiplication
+                pairs = [(a, b) for a in range(5, 16) for b in range(5, 16)]
+            elif operation == '/':
+                # The quotient is known, so no division is needed
+                by_operation.append([self._make_puzzle(dividend, divisor, operation, 3, quotient)
+                                     for dividend, divisor, quotient in _DIV_TABLE])
+                continue
+            elif operation == '-':
+                # Subtraction with larger numbers; num1 >= num2 by range
+                pairs = [(a, b) for a in range(20, 51) for b in range(5, 21)]
+            else:  # Addition
+                pairs = [(a, b) for a in range(20, 51) for b in range(10, 31)]
+            by_operation.append([self._make_puzzle(a, b, operation, 3) for a, b in pairs])
+        return by_operation
     
     def _calculate(self, num1, num2, operation):
         """Calculate the answer for a given operation"""
-        if operation == '+':
-            return num1 + num2
-        elif operation == '-':
-            return num1 - num2
-        elif operation == '*':
-            return num1 * num2
-        elif operation == '/':
-            return num1 / num2
-        else:
-            raise ValueError(f"Unknown operation: {operation}")
+        try:
+            return _OPS[operation](num1, num2)
+        except KeyError:
+            raise ValueError(f"Unknown operation: {operation}") from None
 
 
 # Testing
@@ -147,6 +178,6 @@ if __name__ == "__main__":
         
         for i in range(5):
             puzzle = generator.generate_puzzle(difficulty)
-            print(f"{puzzle['num1']} {puzzle['operation']} {puzzle['num2']} = {puzzle['answer']}")
+            print(f"{puzzle['text']} = {puzzle['answer']}")
     
     print("\n" + "=" * 50)
@@ -1,11 +1,92 @@
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+from tracker_jit import recent_stats
+
+# Recent performance before anything has been recorded (read-only, shared)
+_EMPTY_RECENT = MappingProxyType({
+    'accuracy': 0.0,
+    'avg_time': 0.0,
+    'correct_streak': 0,
+    'incorrect_streak': 0,
+    'recent_problems': 0,
+    'trend': 0  # -1 declining, 0 stable, 1 improving
+})
+
+
+@dataclass(slots=True)
+class Attempt:
+    """A single answered problem, as kept in the problem log"""
+    puzzle: str
+    user_answer: float
+    correct_answer: float
+    correct: bool
+    time: float
+    difficulty: int
+
+
 class PerformanceTracker:
     """Tracks user performance across problems"""
     
-    def __init__(self):
-        self.history = []
+    def __init__(self, capacity=64, max_history=64):
+        """
+        Args:
+            capacity (int): Initial size of the column arrays (grows as needed)
+            max_history (int): Number of full records kept for the problem log
+        """
+        # Every field is stored column-wise (one array per field) so the
+        # aggregates run as vectorized reductions over the whole session.
+        # The text/answer columns only feed the problem log, so they keep just
+        # the most recent max_history entries.
+        self._correct = np.zeros(capacity, dtype=bool)
+        self._time = np.zeros(capacity, dtype=np.float64)
+        self._difficulty = np.zeros(capacity, dtype=np.int8)
+        self._n = 0
+        
+        # Running totals so the session aggregates are O(1)
+        self._correct_n = 0
+        self._sum_time = 0.0
+        # Per-level [correct, total] counts, indexed by difficulty (row 0 unused)
+        self._by_diff = np.zeros((4, 2), dtype=np.int64)
+        
+        # get_recent_performance results by window size, until the next record
+        self._recent_cache = {}
+        # get_summary result, until the next record
+        self._summary_cache = None
+        
+        self._puzzles = deque(maxlen=max_history)
+        self._user_answers = deque(maxlen=max_history)
+        self._correct_answers = deque(maxlen=max_history)
+        
+        self.difficulty_changes = 0
+        self.last_difficulty = None
+    
+    def reset(self):
+        """Clear all recorded performance so the tracker can be reused for a new session"""
+        self._n = 0
+        self._correct_n = 0
+        self._sum_time = 0.0
+        self._by_diff[:] = 0
+        self._recent_cache.clear()
+        self._summary_cache = None
+        self._puzzles.clear()
+        self._user_answers.clear()
+        self._correct_answers.clear()
         self.difficulty_changes = 0
         self.last_difficulty = None
     
+    def _grow(self):
+        """Double the capacity of the column arrays"""
+        capacity = 2 * len(self._correct)
+        for name in ('_correct', '_time', '_difficulty'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+    
     def record_performance(self, puzzle, user_answer, correct_answer, is_correct, time_taken, difficulty):
         """
         Record performance for a single problem (Console version)
@@ -18,36 +99,31 @@ class PerformanceTracker:
             time_taken (float): Time in seconds
             difficulty (int): Difficulty level (1-3)
         """
-        record = {
-            'puzzle': puzzle,
-            'user_answer': user_answer,
-            'correct_answer': correct_answer,
-            'correct': is_correct,
-            'time': time_taken,
-            'difficulty': difficulty
-        }
+        self._puzzles.append(puzzle)
+        self._user_answers.append(user_answer)
+        self._correct_answers.append(correct_answer)
         
-        self.history.append(record)
+        if self._n == len(self._correct):
+            self._grow()
+        self._correct[self._n] = is_correct
+        self._time[self._n] = time_taken
+        self._difficulty[self._n] = difficulty
+        self._n += 1
+        self._recent_cache.clear()
+        self._summary_cache = None
+        self._correct_n += int(is_correct)
+        self._sum_time += time_taken
+        if 1 <= difficulty <= 3:
+            self._by_diff[difficulty, 0] += int(is_correct)
+            self._by_diff[difficulty, 1] += 1
         
         # Track difficulty changes
         if self.last_difficulty is not None and self.last_difficulty != difficulty:
             self.difficulty_changes += 1
         self.last_difficulty = difficulty
     
-    def record_attempt(self, puzzle, user_answer, correct_answer, is_correct, time_taken, difficulty):
-        """
-        Record performance for a single problem (Streamlit version - same as record_performance)
-        
-        Args:
-            puzzle (str): The problem string
-            user_answer (float): User's answer
-            correct_answer (float): Correct answer
-            is_correct (bool): Whether answer was correct
-            time_taken (float): Time in seconds
-            difficulty (int): Difficulty level (1-3)
-        """
-        # Just call record_performance - they do the same thing
-        self.record_performance(puzzle, user_answer, correct_answer, is_correct, time_taken, difficulty)
+    # Streamlit version - same as record_performance
+    record_attempt = record_performance
     
     def calculate_accuracy(self):
         """
@@ -56,11 +132,7 @@ class PerformanceTracker:
         Returns:
             float: Accuracy percentage (0-100)
         """
-        if not self.history:
-            return 0.0
-        
-        correct_count = sum(1 for r in self.history if r['correct'])
-        return (correct_count / len(self.history)) * 100
+        return 100.0 * self._correct_n / max(self._n, 1)
     
     def calculate_avg_time(self):
         """
@@ -69,90 +141,88 @@ class PerformanceTracker:
         Returns:
             float: Average time in seconds
         """
-        if not self.history:
-            return 0.0
-        
-        total_time = sum(r['time'] for r in self.history)
-        return total_time / len(self.history)
+        return self._sum_time / max(self._n, 1)
     
     def get_total_problems(self):
         """Get total number of problems attempted"""
-        return len(self.history)
+        return self._n
     
     def get_correct_count(self):
         """Get number of correct answers"""
-        return sum(1 for r in self.history if r['correct'])
+        return self._correct_n
     
     def get_incorrect_count(self):
         """Get number of incorrect answers"""
-        return len(self.history) - self.get_correct_count()
+        return self._n - self._correct_n
     
     def get_history(self):
-        """Get complete performance history"""
-        return self.history
+        """Get the most recent Attempt records (up to max_history), oldest first"""
+        return [self._record_view(i) for i in range(self._n - len(self._puzzles), self._n)]
+    
+    def _record_view(self, i):
+        """
+        Build the Attempt record for problem i from the columns
+        
+        Args:
+            i (int): Session index of the problem; must be one of the last
+                max_history problems
+        
+        Returns:
+            Attempt: The full record
+        """
+        j = i - (self._n - len(self._puzzles))
+        return Attempt(
+            self._puzzles[j], self._user_answers[j], self._correct_answers[j],
+            bool(self._correct[i]), float(self._time[i]), int(self._difficulty[i])
+        )
     
     def get_recent_performance(self, n=3):
         """
         Get recent performance metrics for ML model
         
         Args:
-            n (int): Number of recent problems to analyze
+            n (int): Number of recent problems to analyze (at least 1)
         
         Returns:
-            dict: Performance metrics
+            dict: Performance metrics (cached until the next record; don't modify)
+        
+        Raises:
+            ValueError: If n is less than 1
         """
-        if not self.history:
-            return {
-                'accuracy': 0.0,
-                'avg_time': 0.0,
-                'correct_streak': 0,
-                'incorrect_streak': 0,
-                'recent_problems': 0,
-                'trend': 0  # -1 declining, 0 stable, 1 improving
-            }
+        cached = self._recent_cache.get(n)
+        if cached is not None:
+            return cached
         
-        recent = self.history[-n:] if len(self.history) >= n else self.history
-        
-        # Calculate metrics
-        correct_count = sum(1 for r in recent if r['correct'])
-        total_count = len(recent)
-        accuracy = (correct_count / total_count) * 100 if total_count > 0 else 0
-        
-        avg_time = sum(r['time'] for r in recent) / total_count if total_count > 0 else 0
-        
-        # Calculate streaks
-        correct_streak = 0
-        incorrect_streak = 0
-        for record in reversed(recent):
-            if record['correct']:
-                correct_streak += 1
-                if incorrect_streak > 0:
-                    break
-            else:
-                incorrect_streak += 1
-                if correct_streak > 0:
-                    break
-        
-        # Calculate trend (comparing first half vs second half of recent)
-        trend = 0
-        if len(recent) >= 4:
-            mid = len(recent) // 2
-            first_half_acc = sum(1 for r in recent[:mid] if r['correct']) / mid
-            second_half_acc = sum(1 for r in recent[mid:] if r['correct']) / (len(recent) - mid)
-            
-            if second_half_acc > first_half_acc + 0.2:
-                trend = 1  # Improving
-            elif second_half_acc < first_half_acc - 0.2:
-                trend = -1  # Declining
+        # Only valid sizes are ever cached; the kernel needs a non-empty window
+        if n < 1:
+            raise ValueError(f"Window size must be at least 1, got {n}")
         
-        return {
-            'accuracy': accuracy,
-            'avg_time': avg_time,
-            'correct_streak': correct_streak,
-            'incorrect_streak': incorrect_streak,
-            'recent_problems': total_count,
-            'trend': trend
+        if not self._n:
+            return _EMPTY_RECENT
+        
+        if n == 1:
+            # The window is just the latest problem
+            is_correct = bool(self._correct[self._n - 1])
+            accuracy = 100.0 if is_correct else 0.0
+            avg_time = self._time[self._n - 1]
+            correct_streak, incorrect_streak = (1, 0) if is_correct else (0, 1)
+            trend = 0
+        else:
+            # Accuracy, time, streaks and trend in one compiled scan of the window
+            accuracy, avg_time, correct_streak, incorrect_streak, trend = recent_stats(
+                self._correct, self._time, max(0, self._n - n), self._n
+            )
+        
+        metrics = {
+            'accuracy': float(accuracy),
+            'avg_time': float(avg_time),
+            'correct_streak': int(correct_streak),
+            'incorrect_streak': int(incorrect_streak),
+            'recent_problems': min(n, self._n),
+            'trend': int(trend)
         }
+        self._recent_cache[n] = metrics
+        return metrics
     
     def get_difficulty_distribution(self):
         """
@@ -161,11 +231,7 @@ class PerformanceTracker:
         Returns:
             dict: Count of problems at each difficulty level
         """
-        distribution = {1: 0, 2: 0, 3: 0}
-        for record in self.history:
-            if record['difficulty'] in distribution:
-                distribution[record['difficulty']] += 1
-        return distribution
+        return {level: int(self._by_diff[level, 1]) for level in (1, 2, 3)}
     
     def get_performance_by_difficulty(self):
         """
@@ -174,29 +240,23 @@ class PerformanceTracker:
         Returns:
             dict: Performance data for each difficulty
         """
-        perf_by_diff = {
-            1: {'correct': 0, 'total': 0}, 
-            2: {'correct': 0, 'total': 0}, 
-            3: {'correct': 0, 'total': 0}
+        return {
+            level: {'correct': int(self._by_diff[level, 0]), 'total': int(self._by_diff[level, 1])}
+            for level in (1, 2, 3)
         }
-        
-        for record in self.history:
-            diff = record['difficulty']
-            if diff in perf_by_diff:
-                perf_by_diff[diff]['total'] += 1
-                if record['correct']:
-                    perf_by_diff[diff]['correct'] += 1
-        
-        return perf_by_diff
     
     def get_summary(self):
         """
         Get comprehensive session summary
         
         Returns:
-            dict: Complete performance summary
+            dict: Complete performance summary (cached until the next record;
+                don't modify)
         """
-        if not self.history:
+        if self._summary_cache is not None:
+            return self._summary_cache
+        
+        if not self._n:
             return {
                 'total_problems': 0,
                 'correct': 0,
@@ -219,13 +279,11 @@ class PerformanceTracker:
                 }
             }
         
-        total_problems = len(self.history)
-        correct = sum(1 for r in self.history if r['correct'])
+        total_problems = self._n
+        correct = self._correct_n
         incorrect = total_problems - correct
-        accuracy = (correct / total_problems) * 100
-        
-        total_time = sum(r['time'] for r in self.history)
-        avg_time = total_time / total_problems
+        accuracy = self.calculate_accuracy()
+        avg_time = self.calculate_avg_time()
         
         # Difficulty distribution
         difficulty_dist = self.get_difficulty_distribution()
@@ -234,7 +292,7 @@ class PerformanceTracker:
         perf_by_diff = self.get_performance_by_difficulty()
         
         # Final difficulty and recommendation
-        final_difficulty = self.history[-1]['difficulty']
+        final_difficulty = int(self._difficulty[self._n - 1])
         
         # Recommend next difficulty based on final performance
         recent_perf = self.get_recent_performance(3)
@@ -245,7 +303,7 @@ class PerformanceTracker:
         else:
             recommended = final_difficulty
         
-        return {
+        self._summary_cache = {
             'total_problems': total_problems,
             'correct': correct,
             'incorrect': incorrect,
@@ -262,6 +320,34 @@ class PerformanceTracker:
                 'last_confidence': recent_perf['accuracy'] / 100
             }
         }
+        return self._summary_cache
+    
+    def export_arrays(self):
+        """
+        Export the session as feature columns for ML training
+        
+        Returns:
+            dict: Arrays of length n keyed by feature; prev_correct is -1 for
+                the first problem
+        """
+        n = self._n
+        correct = self._correct[:n].copy()
+        times = self._time[:n].copy()
+        
+        # Context from the previous problem, shifted by one
+        prev_correct = np.full(n, -1, dtype=np.int8)
+        prev_correct[1:] = correct[:-1]
+        prev_time = np.zeros(n, dtype=np.float64)
+        prev_time[1:] = times[:-1]
+        
+        return {
+            'problem_num': np.arange(1, n + 1),
+            'difficulty': self._difficulty[:n].copy(),
+            'correct': correct,
+            'time': times,
+            'prev_correct': prev_correct,
+            'prev_time': prev_time,
+        }
     
     def export_data(self):
         """
@@ -270,26 +356,27 @@ class PerformanceTracker:
         Returns:
             list: List of feature dictionaries
         """
-        export = []
-        for i, record in enumerate(self.history):
-            # Get context from previous problems
-            if i > 0:
-                prev_correct = self.history[i-1]['correct']
-                prev_time = self.history[i-1]['time']
-            else:
-                prev_correct = None
-                prev_time = 0
-            
-            export.append({
-                'problem_num': i + 1,
-                'difficulty': record['difficulty'],
-                'correct': record['correct'],
-                'time': record['time'],
-                'prev_correct': prev_correct,
-                'prev_time': prev_time,
-            })
+        columns = self.export_arrays()
+        correct = columns['correct'].tolist()
+        times = columns['time'].tolist()
+        
+        # Context from the previous problem (none for the first)
+        prev_correct = [None] + correct[:-1]
         
-        return export
+        return [
+            {
+                'problem_num': problem_num,
+                'difficulty': difficulty,
+                'correct': is_correct,
+                'time': time,
+                'prev_correct': prev,
+                'prev_time': prev_time,
+            }
+            for problem_num, difficulty, is_correct, time, prev, prev_time in zip(
+                columns['problem_num'].tolist(), columns['difficulty'].tolist(),
+                correct, times, prev_correct, columns['prev_time'].tolist()
+            )
+        ]
 
 
 # Testing
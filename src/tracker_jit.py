@@ -0,0 +1,61 @@
+"""
+Compiled numeric kernels for the performance tracker
+
+Metrics over the recent window of recorded problems.
+"""
+
+import numpy as np
+
+from _jit import njit
+
+
+# Change in half-window accuracy that counts as improving/declining
+TREND_THRESHOLD = 0.2
+
+
+@njit('Tuple((f8, f8, i8, i8, i8))(b1[:], f8[:], i8, i8)', cache=True)
+def recent_stats(correct, time, start, end):
+    """
+    Metrics over the recorded window [start, end)
+
+    Args:
+        correct (np.ndarray): Correctness column (bool)
+        time (np.ndarray): Response time column in seconds (float64)
+        start (int): First index of the window
+        end (int): One past the last index of the window (end > start)
+
+    Returns:
+        tuple: (accuracy, avg_time, correct_streak, incorrect_streak, trend)
+    """
+    total_count = end - start
+    half = total_count // 2
+
+    # Running correct count: the total and both half-window counts are
+    # read off one cumulative sum
+    correct_so_far = np.cumsum(correct[start:end])
+    total_correct = correct_so_far[-1]
+
+    accuracy = total_correct / total_count * 100
+    avg_time = time[start:end].sum() / total_count
+
+    # Length of the run of correct (or incorrect) answers ending at the
+    # latest problem; the other streak is 0. argmax finds the first answer
+    # that breaks the run, so the plain-Python fallback also scans in C
+    latest = correct[end - 1]
+    flips = correct[start:end][::-1] != latest
+    run = np.argmax(flips) if flips.any() else total_count
+    correct_streak = run if latest else 0
+    incorrect_streak = 0 if latest else run
+
+    # Trend: compare the accuracy of the first and second half of the window
+    trend = 0
+    if total_count >= 4:
+        first_half_correct = correct_so_far[half - 1]
+        first_half_acc = first_half_correct / half
+        second_half_acc = (total_correct - first_half_correct) / (total_count - half)
+        if second_half_acc > first_half_acc + TREND_THRESHOLD:
+            trend = 1  # Improving
+        elif second_half_acc < first_half_acc - TREND_THRESHOLD:
+            trend = -1  # Declining
+
+    return accuracy, avg_time, correct_streak, incorrect_streak, trend